@@ -43,7 +43,7 @@
     dosfstools           # FAT/VFAT mkfs/label tools
     zfs                  # ZFS userland (zpool/zfs); kernel enabled elsewhere
     jq                   # JSON processor
-    python3              # Python runtime for helper scripts
+    (python3.withPackages (ps: [ ps.numpy ps.orjson ])) # Python runtime for helper scripts (numpy/orjson for nix-store-clumpgc.py)
     python3Packages.tomli # TOML parser fallback for <3.11 environments
     util-linux           # lsblk/findmnt/blkid/column etc.
     iperf3               # network throughput tester
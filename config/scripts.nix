@@ -79,7 +79,7 @@ let
   # ---------------- Nix store GC policy ----------------
   nixStoreClumpGc = pkgs.writeShellApplication {
     name = "nix-store-clumpgc";
-    runtimeInputs = with pkgs; [ python3 nix coreutils git jq ];
+    runtimeInputs = with pkgs; [ (python3.withPackages (ps: [ ps.numpy ps.orjson ])) nix coreutils git jq ];
     text = ''
       set -euo pipefail
       exec ${./tools/nix-store-clumpgc.py} --apply --state /srv/nixserver/state/gc/state.json "$@"
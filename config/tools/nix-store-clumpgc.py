@@ -19,28 +19,53 @@
 # Notes
 #   - Runs offline. No network required. Works with Nix 2.x/NixOS 25.05.
 #   - Timestamps handled in UTC to avoid DST skew.
+#   - Requires numpy; uses orjson for the state file if importable. Both are
+#     in the system python3 (pkgs.nix) for direct runs and in the
+#     nix-store-clumpgc wrapper's environment (scripts.nix).
 # ==============================================================================
 
-import argparse, subprocess, sys, os, re, json, math, shutil
-from datetime import datetime, timedelta, timezone
+import argparse, subprocess, sys, os, re, json, math, shutil, bisect
+from datetime import datetime, timezone
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+try:
+    import orjson  # faster state serialization when available
+except ImportError:
+    orjson = None
 
 STATE_DEFAULT = "/var/lib/nix-retain/state.json"
 PROFILE = "/nix/var/nix/profiles/system"
 TZ = timezone.utc  # we operate in UTC to avoid DST surprises
+HOUR = 3600.0
+DAY = 86400.0
+# smoothing kernel is truncated at +/- this many sigma. At 9 sigma the weight
+# (exp(-40.5) ~ 2.6e-18) is below float64 resolution of the window areas, so
+# selections match the untruncated kernel. A tighter cut (e.g. 4 sigma) zeroes
+# the grid in gaps, flattening the area curve there and changing which widths
+# the greedy window search picks.
+KERNEL_SIGMAS = 9
+EMPTY_CLOSURE = np.empty(0, dtype=np.int64)
+GEN_LINE_RE = re.compile(r"^\s*(\d+)\s+(\d{4}-\d{2}-\d{2})\s+(\d{2}:\d{2}:\d{2})")
+LINK_RE = re.compile(r"system-(\d+)-link")
 
 # ---- Helpers ----
 
 def run(cmd):
     return subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
+def run_bytes(cmd):
+    # like run(), but leaves stdout undecoded for bulk ASCII output we only parse
+    return subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
 def list_generations():
     # Output format (typical):
     # 123  2025-08-12 12:34:56
     r = run(["nix-env", "-p", PROFILE, "--list-generations"])
     gens = []
     for line in r.stdout.splitlines():
-        m = re.match(r"^\s*(\d+)\s+(\d{4}-\d{2}-\d{2})\s+(\d{2}:\d{2}:\d{2})", line)
+        m = GEN_LINE_RE.match(line)
         if m:
             gen_id = int(m.group(1))
             ts = datetime.fromisoformat(f"{m.group(2)} {m.group(3)}").replace(tzinfo=TZ)
@@ -53,7 +78,7 @@ def booted_generations():
     current = None
     try:
         link = os.path.realpath("/run/current-system")
-        m = re.search(r"system-(\d+)-link", link)
+        m = LINK_RE.search(link)
         if m: current = int(m.group(1))
     except Exception:
         pass
@@ -67,104 +92,119 @@ def gen_path(gen_id):
     return f"/nix/var/nix/profiles/system-{gen_id}-link"
 
 def closure_paths(gen_id):
+    # Closure as a sorted array of 63-bit store-path hashes; cheaper to store
+    # and diff than a set of strings. Hashes are only compared within one run.
     p = gen_path(gen_id)
     if not os.path.exists(p):
-        return set()
-    r = run(["nix-store", "-qR", os.path.realpath(p)])
-    return set(filter(None, r.stdout.splitlines()))
-
-def git_lines_delta(repo_dir, older_ts, newer_ts):
-    # Heuristic: diff between commits nearest to the two generation times.
-    # If no git repo found, return 0.
+        return EMPTY_CLOSURE
+    # stream the pipe so the full listing is never held as str/list/set at once
+    with subprocess.Popen(["nix-store", "-qR", os.path.realpath(p)],
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+        # store paths are ASCII: hash the raw bytes, no decode
+        hashes = np.fromiter((hash(x) & ((1 << 63) - 1) for x in map(bytes.rstrip, proc.stdout) if x),
+                             dtype=np.int64)
+    if proc.returncode != 0:
+        raise RuntimeError(f"nix-store -qR failed for generation {gen_id}")
+    return np.unique(hashes)
+
+def git_history(repo_dir, since_ts):
+    # One `git log --numstat` over HEAD since the oldest generation.
+    # Returns (commit epochs ascending, prefix sums of lines changed).
+    # If no git repo found, every delta comes out as 0. Returns None if git log
+    # fails (e.g. the "dubious ownership" check when running as root).
     if not os.path.isdir(os.path.join(repo_dir, ".git")):
-        return 0
-    def commit_at(ts):
-        r = run(["git", "-C", repo_dir, "rev-list", "-1", f'--before={ts.isoformat()}','HEAD'])
-        c = r.stdout.strip()
-        return c if c else None
-    c_old = commit_at(older_ts)
-    c_new = commit_at(newer_ts)
-    if not c_old or not c_new or c_old == c_new:
-        return 0
-    r = run(["git", "-C", repo_dir, "diff", "--numstat", c_old, c_new])
-    adds = dels = 0
+        return [], [0]
+    r = run_bytes(["git", "-C", repo_dir, "log", "--numstat", "--pretty=format:@%ct",
+                   f"--since={since_ts.isoformat()}", "HEAD"])
+    if r.returncode != 0:
+        return None
+    commits = []
     for line in r.stdout.splitlines():
+        if line.startswith(b"@"):
+            commits.append([int(line[1:]), 0])
+            continue
         parts = line.strip().split()
-        if len(parts) >= 3 and parts[0].isdigit() and parts[1].isdigit():
-            adds += int(parts[0]); dels += int(parts[1])
-    return adds + dels
+        if commits and len(parts) >= 3 and parts[0].isdigit() and parts[1].isdigit():
+            commits[-1][1] += int(parts[0]) + int(parts[1])
+    commits.sort()
+    times = [t for (t, _) in commits]
+    cum = [0]
+    for (_, n) in commits:
+        cum.append(cum[-1] + n)
+    return times, cum
+
+def git_lines_delta(history, older_ep, newer_ep):
+    # Heuristic: lines added+removed by commits landing in (older_ep, newer_ep].
+    # Without a usable history the delta is 0.
+    if history is None:
+        return 0
+    times, cum = history
+    return (cum[bisect.bisect_right(times, newer_ep)]
+            - cum[bisect.bisect_right(times, older_ep)])
 
 def normalize(values):
-    # robust percentile scaling to [0,1]
-    arr = list(values)
-    if not arr: return {}
-    v = sorted(arr)
-    def pct(x):
-        if len(v) == 1: return 0.0
-        # 5th and 95th percentiles
-        p5 = v[int(0.05*(len(v)-1))]
-        p95 = v[int(0.95*(len(v)-1))]
-        if p95 == p5:
-            return 0.0 if x <= p5 else 1.0
-        return max(0.0, min(1.0, (x - p5) / (p95 - p5)))
-    return {x: pct(x) for x in values}
-
-def kernel_smooth(points, sigma_hours=12):
-    # points: list of (ts(datetime), score)
-    if not points: return []
+    # robust percentile scaling to [0,1]; returns a scaler for single values
+    a = np.asarray(list(values), dtype=np.float64)
+    if a.size == 0: return lambda x: 0.0
+    # 5th and 95th percentiles (nearest-rank); partition is O(n), no full sort
+    i5 = int(0.05*(a.size-1)); i95 = int(0.95*(a.size-1))
+    part = np.partition(a, [i5, i95])
+    p5, p95 = part[i5], part[i95]
+    if p95 == p5:
+        return lambda x: 0.0 if x <= p5 else 1.0
+    return lambda x: float(np.clip((x - p5) / (p95 - p5), 0.0, 1.0))
+
+def kernel_halfwidth(sigma_hours):
+    # grid hours on each side of a point's hour that receive kernel weight;
+    # a point at t reaches grid hours floor(t)-W .. floor(t)+W+1
+    return int(math.ceil(KERNEL_SIGMAS*sigma_hours))
+
+def kernel_smooth(ts_ep, scores, sigma_hours=12):
+    # ts_ep: ascending epoch seconds, scores: matching weights
+    # returns (grid_ep, vals) on an hourly grid covering the points
+    if len(ts_ep) == 0: return np.empty(0), np.empty(0)
     # build hourly grid
-    start = points[0][0].replace(minute=0, second=0, microsecond=0)
-    end = points[-1][0].replace(minute=0, second=0, microsecond=0)
-    hours = int((end - start).total_seconds() // 3600) + 1
-    grid = []
+    start = math.floor(ts_ep[0] / HOUR) * HOUR
+    end = math.floor(ts_ep[-1] / HOUR) * HOUR
+    hours = int((end - start) // HOUR) + 1
     s2 = 2*(sigma_hours**2)
-    for i in range(hours):
-        t = start + timedelta(hours=i)
-        val = 0.0
-        for (pt, sc) in points:
-            dh = abs((pt - t).total_seconds())/3600.0
-            val += sc * math.exp(-(dh*dh)/s2)
-        grid.append((t, val))
-    return grid
-
-def select_integral_windows(grid, min_days=5, max_days=10, min_area=0.0):
-    # greedy non-overlapping windows maximizing integral
-    selected = []
-    used = [False]*len(grid)
+    # point offsets in hours since grid start
+    off = (np.asarray(ts_ep, dtype=np.float64) - start) / HOUR
+    sc_arr = np.asarray(scores, dtype=np.float64)
+    # truncate the kernel at +/-KERNEL_SIGMAS: each point only spreads its
+    # score onto the grid hours inside that window
+    W = kernel_halfwidth(sigma_hours)
+    idx = np.floor(off).astype(np.int64)[:, None] + np.arange(-W, W+2)[None, :]
+    dh = idx - off[:, None]
+    wts = sc_arr[:, None] * np.exp(-(dh*dh)/s2)
+    inside = (idx >= 0) & (idx < hours)
+    vals = np.bincount(idx[inside], weights=wts[inside], minlength=hours)
+    return start + HOUR*np.arange(hours, dtype=np.float64), vals
+
+def select_integral_windows(grid_ep, vals, min_days=5, max_days=10, min_area=0.0):
+    # greedy non-overlapping windows maximizing integral; returns epoch bounds
     HMIN = int(min_days*24); HMAX = int(max_days*24)
-    # precompute prefix sums
-    vals = [v for (_,v) in grid]
-    pref = [0.0]
-    for v in vals:
-        pref.append(pref[-1] + v)
-    def area(i,j):  # [i, j)
-        return pref[j] - pref[i]
-    # masks with guard bands are handled by marking used
-    def first_unused():
-        for i,f in enumerate(used):
-            if not f: return i
-        return None
-    i0 = first_unused()
-    while i0 is not None:
-        best = None
-        for L in range(HMIN, HMAX+1):
-            j = i0 + L
-            if j > len(grid): break
-            a = area(i0, j)
-            if a >= min_area:
-                if not best or a > best[2]:
-                    best = (i0,j,a)
-        if not best:
-            used[i0] = True
-            i0 = first_unused()
+    n = len(vals)
+    # precompute prefix sums (area of [i, j) is pref[j] - pref[i])
+    pref = np.concatenate(([0.0], np.cumsum(vals)))
+    selected = []
+    # windows are anchored at the left-most free hour, so everything before the
+    # cursor is already taken; a selected window pushes it past the guard +/- 12h
+    i0 = 0
+    while i0 < n:
+        # areas of every admissible width at this anchor in one slice
+        end_min = i0 + HMIN
+        end_max = min(i0 + HMAX + 1, n + 1)
+        if end_max <= end_min: break
+        areas = pref[end_min:end_max] - pref[i0]
+        k = int(np.argmax(areas))
+        if areas[k] < min_area:
+            i0 += 1
             continue
-        (i,j,a) = best
-        selected.append((i,j))
-        # mask with guard +/- 12h
-        for k in range(max(0,i-12), min(len(grid), j+12)):
-            used[k] = True
-        i0 = first_unused()
-    return [(grid[i][0], grid[j-1][0]) for (i,j) in selected]
+        j = end_min + k
+        selected.append((i0,j))
+        i0 = j + 12
+    return [(grid_ep[i], grid_ep[j-1]) for (i,j) in selected]
 
 def month_key(dt):
     return dt.year*100 + dt.month
@@ -180,7 +220,10 @@ def load_state(path):
 def save_state(path, data):
     ensure_dir(path)
     tmp = path + ".new"
-    with open(tmp, "w") as f: json.dump(data, f, indent=2, sort_keys=True)
+    if orjson:
+        with open(tmp, "wb") as f: f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+    else:
+        with open(tmp, "w") as f: json.dump(data, f, indent=2, sort_keys=True)
     os.replace(tmp, path)
 
 def main():
@@ -199,47 +242,94 @@ def main():
 
     cur, prev = booted_generations()
     state = load_state(args.state)
+    # time arithmetic below runs on epoch seconds; datetimes are kept only for
+    # calendar keys and the state file
+    ts_ep = np.array([ts.timestamp() for (_, ts) in gens])
+    now_ep = ts_ep[-1]
+    cutoff_ep = now_ep - 10*DAY
+    # scores only matter through the smoothed grid up to the 10d cutoff; pairs
+    # starting later than the kernel reach past it get no delta (base score)
+    horizon_ep = cutoff_ep + (kernel_halfwidth(args.sigma_hours) + 1)*HOUR
 
     # Build features
-    # closure path deltas
-    path_sets = {}
-    for gid, _ in gens:
-        try:
-            path_sets[gid] = closure_paths(gid)
-        except Exception:
-            path_sets[gid] = set()
+    # reuse deltas cached in state for pairs whose predecessor is unchanged
+    # (and, for lines_delta, --repo too); only new generations (or ones whose
+    # predecessor was deleted) are recomputed
     lines_delta = {}
     paths_delta = {}
     score = {}
+    # indices i of pairs (gens[i-1], gens[i]) still to compute, per feature
+    todo_lines = []
+    todo_paths = []
     for i in range(1, len(gens)):
-        gid_p, ts_p = gens[i-1]
-        gid, ts = gens[i]
+        if ts_ep[i-1] > horizon_ep: break
+        gid = gens[i][0]
+        s = state["gens"].get(str(gid), {})
+        same_prev = s.get("prev") == gens[i-1][0]
+        if same_prev and s.get("repo") == args.repo and "lines_delta" in s:
+            lines_delta[gid] = s["lines_delta"]
+        else:
+            todo_lines.append(i)
+        if same_prev and "paths_delta" in s:
+            paths_delta[gid] = s["paths_delta"]
+        else:
+            todo_paths.append(i)
+
+    # closure path deltas
+    # one nix-store query per distinct system-link target (no-op rebuilds
+    # point at the same store path); these are subprocess-bound, so fan out
+    def closure_or_none(gid):
+        try:
+            return closure_paths(gid)
+        except Exception:
+            return None
+    gids = sorted({gens[k][0] for i in todo_paths for k in (i-1, i)})
+    rep = {}      # gid -> gid whose closure it shares
+    by_link = {}  # system-link target -> first gid pointing at it
+    for gid in gids:
+        try:
+            link = os.readlink(gen_path(gid))
+        except OSError:
+            link = None
+        rep[gid] = by_link.setdefault(link, gid) if link else gid
+    query = sorted(set(rep.values()))
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as ex:
+        closures = dict(zip(query, ex.map(closure_or_none, query)))
+    path_sets = {gid: closures[rep[gid]] for gid in gids}
+    history = git_history(args.repo, gens[todo_lines[0]-1][1]) if todo_lines else None
+    # deltas computed from a failed git log or closure query are used for this
+    # run only, never cached, so they are retried next time
+    uncached_lines = set()
+    uncached_paths = set()
+    for i in todo_lines:
+        gid = gens[i][0]
+        if history is None:
+            uncached_lines.add(gid)
         # git lines
-        ld = git_lines_delta(args.repo, ts_p, ts)
-        lines_delta[gid] = ld
+        lines_delta[gid] = git_lines_delta(history, ts_ep[i-1], ts_ep[i])
+    for i in todo_paths:
+        gid_p, gid = gens[i-1][0], gens[i][0]
+        c_p, c = path_sets[gid_p], path_sets[gid]
+        if c_p is None or c is None:
+            uncached_paths.add(gid)
         # store path delta
-        added = len(path_sets.get(gid, set()) - path_sets.get(gid_p, set()))
-        removed = len(path_sets.get(gid_p, set()) - path_sets.get(gid, set()))
-        paths_delta[gid] = added + removed
+        paths_delta[gid] = int(np.setxor1d(EMPTY_CLOSURE if c is None else c,
+                                           EMPTY_CLOSURE if c_p is None else c_p,
+                                           assume_unique=True).size)
 
     # normalize features over observed deltas (skip first gen)
     norm_lines = normalize(list(lines_delta.values()))
     norm_paths = normalize(list(paths_delta.values()))
 
-    for i, (gid, ts) in enumerate(gens):
+    for gid, ts in gens:
         base = 0.1 # rebuild event weight
-        if i == 0:
+        if gid not in lines_delta:
             sc = base
         else:
-            sc = base + 0.5*norm_lines.get(lines_delta.get(gid,0), 0.0) + 0.4*norm_paths.get(paths_delta.get(gid,0), 0.0)
+            sc = base + 0.5*norm_lines(lines_delta[gid]) + 0.4*norm_paths(paths_delta[gid])
         score[gid] = sc
 
-    # Kernel smoother grid
-    points = [(ts, score[gid]) for (gid, ts) in gens]
-    grid = kernel_smooth(points, sigma_hours=args.sigma_hours)
-
     # Partition by age
-    now = gens[-1][1]
     keep = set()
     reasons = {}
 
@@ -247,91 +337,91 @@ def main():
     if cur: keep.add(cur); reasons[cur] = "booted-current"
     if prev: keep.add(prev); reasons[prev] = "booted-previous"
 
+    # gens is sorted by ts, so each age band is a contiguous slice
+    i3 = int(np.searchsorted(ts_ep, now_ep - 3*DAY))
+    i10 = int(np.searchsorted(ts_ep, cutoff_ep))
+    i90 = int(np.searchsorted(ts_ep, now_ep - 90*DAY))
+
     # 0–3 days: keep everything
-    for gid, ts in gens:
-        if (now - ts) <= timedelta(days=3):
-            keep.add(gid); reasons[gid] = "<=3d"
+    for gid, ts in gens[i3:]:
+        keep.add(gid); reasons[gid] = "<=3d"
 
     # 3–10 days: daily keep + productive stretches
     # daily: pick last generation per calendar day
     daily = {}
-    for gid, ts in gens:
-        if timedelta(days=3) < (now - ts) <= timedelta(days=10):
-            k = ts.date()
-            if k not in daily or ts > daily[k][1]:
-                daily[k] = (gid, ts)
+    for gid, ts in gens[i10:i3]:
+        daily[ts.date()] = (gid, ts)
     for gid, ts in daily.values():
         if gid not in keep:
             keep.add(gid); reasons[gid] = "daily"
 
     # productive stretches: mean inter-arrival <= 12h over >=36h span
     # build list in the 3–10d range
-    subset = [(gid, ts) for (gid, ts) in gens if timedelta(days=3) < (now - ts) <= timedelta(days=10)]
+    subset = gens[i10:i3]
     if len(subset) >= 2:
-        i = 0
+        times = ts_ep[i10:i3]
+        # mean inter-arrival over [i..j] <= 12h  <=>  u[j] <= u[i]
+        u = times - 12*HOUR*np.arange(len(subset))
+        i, j = 0, 1
         while i < len(subset)-1:
-            j = i+1
-            spans = []
-            while j < len(subset):
-                span = (subset[j][1] - subset[i][1])
-                if span >= timedelta(hours=36):
-                    # compute mean inter-arrival over [i..j]
-                    total = (subset[j][1] - subset[i][1]).total_seconds()
-                    intervals = j - i
-                    mean = total / intervals if intervals>0 else 1e9
-                    if mean <= 12*3600:
-                        # keep first, +24h (closest), last
-                        first_gid, first_ts = subset[i]
-                        last_gid, last_ts = subset[j]
-                        # find +24h
-                        target = first_ts + timedelta(hours=24)
-                        mid_gid, mid_ts, mdiff = None, None, None
-                        for k in range(i, j+1):
-                            gidk, tsk = subset[k]
-                            diff = abs((tsk - target).total_seconds())
-                            if mdiff is None or diff < mdiff:
-                                mid_gid, mid_ts, mdiff = gidk, tsk, diff
-                        for gg, rr in [(first_gid, "prod-first"),
-                                       (mid_gid, "prod-+24h"),
-                                       (last_gid, "prod-last")]:
-                            if gg not in keep:
-                                keep.add(gg); reasons[gg] = rr
-                        i = j  # jump
-                        break
+            # first j spanning >= 36h from i; only moves forward as i does
+            j = max(j, i+1)
+            while j < len(subset) and times[j] - times[i] < 36*HOUR:
                 j += 1
-            else:
+            hit = np.flatnonzero(u[j:] <= u[i])
+            if hit.size == 0:
                 i += 1
+                continue
+            last = j + int(hit[0])
+            # keep first, +24h (closest), last
+            mid = i + int(np.argmin(np.abs(times[i:last+1] - (times[i] + 24*HOUR))))
+            for k, rr in [(i, "prod-first"), (mid, "prod-+24h"), (last, "prod-last")]:
+                gg = subset[k][0]
+                if gg not in keep:
+                    keep.add(gg); reasons[gg] = rr
+            i = last  # jump
 
     # >10 days: integral clumping into 5–10d windows
     # Build windows from the smoothed grid beyond 10d ago
-    cutoff = now - timedelta(days=10)
-    grid_tail = [(t,v) for (t,v) in grid if t <= cutoff]
-    if grid_tail:
-        windows = select_integral_windows(grid_tail, min_days=5, max_days=10, min_area=0.0)
+    # (skipped entirely when nothing is that old yet)
+    if ts_ep[0] <= cutoff_ep:
+        # Kernel smoother grid
+        grid_ep, vals = kernel_smooth(ts_ep, [score[gid] for (gid, _) in gens], sigma_hours=args.sigma_hours)
+        n_tail = int(np.searchsorted(grid_ep, cutoff_ep, side="right"))
+        windows = select_integral_windows(grid_ep[:n_tail], vals[:n_tail], min_days=5, max_days=10, min_area=0.0)
         # For each window, keep the last generation whose ts falls within the window
         for (ws, we) in windows:
-            cand = [(gid, ts) for (gid, ts) in gens if ws <= ts <= we]
-            if cand:
-                gid_keep, ts_keep = cand[-1]
+            lo = int(np.searchsorted(ts_ep, ws, side="left"))
+            hi = int(np.searchsorted(ts_ep, we, side="right"))
+            if hi > lo:
+                gid_keep = gens[hi-1][0]
                 if gid_keep not in keep:
                     keep.add(gid_keep); reasons[gid_keep] = "clump-longterm"
 
     # >3 months: monthly last
     months = {}
-    for gid, ts in gens:
-        if (now - ts) > timedelta(days=90):
-            mk = month_key(ts)
-            if mk not in months or ts > months[mk][1]:
-                months[mk] = (gid, ts)
+    for gid, ts in gens[:i90]:
+        months[month_key(ts)] = (gid, ts)
     for gid, ts in months.values():
         if gid not in keep:
             keep.add(gid); reasons[gid] = "monthly"
 
     # Persist state & decide deletions
-    for gid, ts in gens:
+    for i, (gid, ts) in enumerate(gens):
         s = state["gens"].setdefault(str(gid), {})
         s["ts"] = ts.isoformat()
         s["score"] = score.get(gid, 0.0)
+        if gid in lines_delta:
+            # cached deltas belong to one predecessor; drop them if it changed
+            if s.get("prev") != gens[i-1][0]:
+                for k in ("lines_delta", "paths_delta", "repo"):
+                    s.pop(k, None)
+            s["prev"] = gens[i-1][0]
+            if gid not in uncached_lines:
+                s["lines_delta"] = lines_delta[gid]
+                s["repo"] = args.repo
+            if gid not in uncached_paths:
+                s["paths_delta"] = paths_delta[gid]
         if str(gid) in state.get("pinned", {}):
             keep.add(gid); reasons[gid] = "pinned"
 
@@ -365,11 +455,9 @@ def main():
         print(r.stdout)
         if r.returncode != 0:
             print(r.stderr, file=sys.stderr)
-        # optional: trigger store GC
+        # optional: trigger store GC (nix-collect-garbage already runs the store GC)
         run(["nix-collect-garbage"])
-        run(["nix-store", "--gc"])
         # append to deleted list
-        state = load_state(args.state)
         state["deleted"].extend(plan_delete)
         save_state(args.state, state)
 